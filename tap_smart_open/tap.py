@@ -1,16 +1,37 @@
 from __future__ import annotations
 
-from typing import List
+import datetime
+import decimal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, ClassVar, Dict, List, Tuple
 
+import orjson
+from fsspec import AbstractFileSystem
 from singer_sdk import Stream, Tap
 from singer_sdk import typing as th
+from singer_sdk._singerlib import Message, SingerMessageType
 
 from .streams import SmartOpenStream
 
 
+def _json_default(obj: Any) -> str:
+    """Encode values orjson does not handle natively, like the SDK's serializer does."""
+    if isinstance(obj, decimal.Decimal):
+        # Decimals must stay JSON numbers; let the SDK serializer handle them
+        raise TypeError
+    return obj.isoformat(sep="T") if isinstance(obj, datetime.datetime) else str(obj)
+
+
 class TapSmartOpen(Tap):
     name = "tap-smart-open"
 
+    # Inferred schemas keyed by stream config and resolved paths, stored with
+    # the identities of the files they were read from; shared by every tap
+    # instance in the process
+    _schema_cache: ClassVar[Dict[str, Dict[str, Any]]] = {}
+
     config_jsonschema = th.PropertiesList(
         th.Property(
             "streams",
@@ -23,6 +44,17 @@ class TapSmartOpen(Tap):
                         th.ArrayType(th.StringType),
                         description="Explicit list of URIs; overrides 'uri' if provided.",
                     ),
+                    th.Property(
+                        "pattern",
+                        th.StringType,
+                        description="Regex matched against file names. With a non-glob 'uri', the URI is listed as a directory.",
+                    ),
+                    th.Property(
+                        "sort_paths",
+                        th.BooleanType,
+                        description="Sort files matched by a glob or directory listing. Disable to keep the storage backend's listing order.",
+                        default=True,
+                    ),
                     th.Property(
                         "format",
                         th.StringType,
@@ -46,9 +78,15 @@ class TapSmartOpen(Tap):
                     th.Property(
                         "chunksize",
                         th.IntegerType,
-                        description="Chunk size for CSV/JSONL reading.",
+                        description="Chunk size for CSV/JSONL reading, and record batch size for Parquet.",
                         default=50000,
                     ),
+                    th.Property(
+                        "prefetch",
+                        th.IntegerType,
+                        description="Number of remote CSV/JSONL/JSON files to download concurrently ahead of parsing (0 disables).",
+                        default=4,
+                    ),
                     th.Property(
                         "infer_samples",
                         th.IntegerType,
@@ -60,6 +98,12 @@ class TapSmartOpen(Tap):
                         th.ObjectType(additional_properties=True),
                         description="Explicit JSON Schema override (skip inference).",
                     ),
+                    th.Property(
+                        "permissive_schema",
+                        th.BooleanType,
+                        description="Skip inference and emit a schema declaring only the key fields, with additionalProperties allowed.",
+                        default=False,
+                    ),
                     th.Property(
                         "csv",
                         th.ObjectType(
@@ -87,6 +131,17 @@ class TapSmartOpen(Tap):
             ),
             description="Authentication hints. Providers also respect standard environment credentials.",
         ),
+        th.Property(
+            "schema_cache_dir",
+            th.StringType,
+            description="Directory where inferred schemas are persisted and reused while the stream's files are unchanged.",
+        ),
+        th.Property(
+            "output_batch_size",
+            th.IntegerType,
+            description="RECORD messages buffered before each write to stdout.",
+            default=1000,
+        ),
         th.Property(
             "state_checkpoint_interval",
             th.IntegerType,
@@ -95,11 +150,57 @@ class TapSmartOpen(Tap):
         ),
     ).to_dict()
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        # Filesystem handles shared across streams, keyed by (scheme, netloc)
+        self._fs_cache: Dict[Tuple[str, str], AbstractFileSystem] = {}
+        self._fs_lock = threading.Lock()
+        # Serialized RECORD messages waiting to be written to stdout
+        self._output_buffer: List[bytes] = []
+        super().__init__(*args, **kwargs)
+        self._output_batch_size = max(1, int(self.config.get("output_batch_size", 1000)))
+
+    def write_message(self, message: Message) -> None:
+        """Write a message to stdout, serialized with orjson.
+
+        RECORD messages are buffered and written output_batch_size at a time;
+        any other message flushes the buffer first, so ordering is preserved
+        and the STATE message ending each stream's sync flushes its records.
+        """
+        try:
+            line = orjson.dumps(
+                message.to_dict(), default=_json_default, option=orjson.OPT_APPEND_NEWLINE
+            )
+        except TypeError:
+            self._flush_output()
+            super().write_message(message)
+            return
+        self._output_buffer.append(line)
+        if message.type != SingerMessageType.RECORD or len(self._output_buffer) >= self._output_batch_size:
+            self._flush_output()
+
+    def _flush_output(self) -> None:
+        if not self._output_buffer:
+            return
+        buffer = getattr(sys.stdout, "buffer", None)
+        if buffer is not None:
+            buffer.writelines(self._output_buffer)
+        else:
+            # Text-only streams, e.g. a redirected io.StringIO
+            sys.stdout.write(b"".join(self._output_buffer).decode())
+        sys.stdout.flush()
+        self._output_buffer = []
+
     def discover_streams(self) -> List[Stream]:
-        streams: List[Stream] = []
-        for s_cfg in self.config.get("streams", []):
-            streams.append(SmartOpenStream(tap=self, stream_config=s_cfg))
-        return streams
+        stream_configs = self.config.get("streams", [])
+        if len(stream_configs) <= 1:
+            return [self._build_stream(s_cfg) for s_cfg in stream_configs]
+        # Building a stream infers its schema, which mostly waits on file I/O,
+        # so streams are built concurrently (results keep the config order)
+        with ThreadPoolExecutor(max_workers=min(32, len(stream_configs))) as executor:
+            return list(executor.map(self._build_stream, stream_configs))
+
+    def _build_stream(self, stream_config: Dict[str, Any]) -> Stream:
+        return SmartOpenStream(tap=self, stream_config=stream_config)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,34 @@
+"""Shared fixtures for tap-smart-open tests."""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def sample_csv_file(tmp_path_factory: pytest.TempPathFactory) -> Iterator[str]:
+    """Create a temporary CSV file shared by the whole test session."""
+    csv_content = """id,name,value,timestamp
+1,Alice,100,2024-01-01T10:00:00Z
+2,Bob,200,2024-01-01T11:00:00Z
+3,Charlie,300,2024-01-01T12:00:00Z
+"""
+    path = tmp_path_factory.mktemp("fixtures") / "sample.csv"
+    path.write_text(csv_content)
+    yield str(path)
+    path.unlink()
+
+
+@pytest.fixture(scope="session")
+def sample_jsonl_file(tmp_path_factory: pytest.TempPathFactory) -> Iterator[str]:
+    """Create a temporary JSONL file shared by the whole test session."""
+    jsonl_content = """{"id": 1, "name": "Alice", "value": 100, "timestamp": "2024-01-01T10:00:00Z"}
+{"id": 2, "name": "Bob", "value": 200, "timestamp": "2024-01-01T11:00:00Z"}
+{"id": 3, "name": "Charlie", "value": 300, "timestamp": "2024-01-01T12:00:00Z"}
+"""
+    path = tmp_path_factory.mktemp("fixtures") / "sample.jsonl"
+    path.write_text(jsonl_content)
+    yield str(path)
+    path.unlink()
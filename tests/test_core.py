@@ -35,3 +35,22 @@ def test_sync_basic() -> None:
     assert len(recs) == 3
     # Check a couple of types
     assert isinstance(recs[0]["name"], str)
+
+
+def test_sync_incremental_from_state() -> None:
+    cfg = _load_config()
+    state = {
+        "bookmarks": {
+            "example": {
+                "replication_key": "updated_at",
+                "replication_key_value": "2025-01-01T00:00:00Z",
+            }
+        }
+    }
+    tap = TapSmartOpen(config=cfg, state=state)
+    s = {s.name: s for s in tap.discover_streams()}["example"]
+    # Normally done by the SDK at the start of Stream.sync()
+    s._write_starting_replication_value(None)
+    recs = list(s.get_records(context=None))
+    # Only the row strictly after the bookmark is emitted
+    assert [r["name"] for r in recs] == ["Charlie"]
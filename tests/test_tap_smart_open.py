@@ -1,7 +1,6 @@
 """Tests for tap-smart-open."""
 
 import json
-import tempfile
 from pathlib import Path
 
 import pytest
@@ -74,33 +73,6 @@ class TestTapSmartOpenUnit:
         assert streams[0].name == "stream1"
         assert streams[1].name == "stream2"
 
-    @pytest.fixture
-    def sample_csv_file(self):
-        """Create a temporary CSV file for testing."""
-        csv_content = """id,name,value,timestamp
-1,Alice,100,2024-01-01T10:00:00Z
-2,Bob,200,2024-01-01T11:00:00Z
-3,Charlie,300,2024-01-01T12:00:00Z
-"""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            f.write(csv_content)
-            f.flush()
-            yield f.name
-        Path(f.name).unlink()
-
-    @pytest.fixture
-    def sample_jsonl_file(self):
-        """Create a temporary JSONL file for testing."""
-        jsonl_content = """{"id": 1, "name": "Alice", "value": 100, "timestamp": "2024-01-01T10:00:00Z"}
-{"id": 2, "name": "Bob", "value": 200, "timestamp": "2024-01-01T11:00:00Z"}
-{"id": 3, "name": "Charlie", "value": 300, "timestamp": "2024-01-01T12:00:00Z"}
-"""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.jsonl', delete=False) as f:
-            f.write(jsonl_content)
-            f.flush()
-            yield f.name
-        Path(f.name).unlink()
-
     def test_csv_stream_processing(self, sample_csv_file):
         """Test CSV stream processing."""
         config = {
@@ -224,4 +196,670 @@ class TestTapSmartOpenUnit:
         stream = streams[0]
         
         schema = stream.schema
-        assert schema == explicit_schema
\ No newline at end of file
+        assert schema == explicit_schema
+
+    def test_compressed_file_cached_locally(self, tmp_path):
+        """Test compressed files are spooled to a local copy once, reused, then removed."""
+        import gzip
+
+        gz_path = tmp_path / "sample.jsonl.gz"
+        with gzip.open(gz_path, "wt") as f:
+            f.write('{"id": 1, "name": "Alice"}\n{"id": 2, "name": "Bob"}\n')
+
+        config = {
+            "streams": [
+                {
+                    "name": "test_gz",
+                    "uri": str(gz_path),
+                    "format": "jsonl",
+                    "keys": ["id"],
+                }
+            ]
+        }
+        tap = TapSmartOpen(config=config)
+        stream = tap.streams["test_gz"]
+
+        local_copy = stream._cached_local_paths[str(gz_path)]
+        assert Path(local_copy).exists()
+        records = list(stream.get_records(None))
+        assert [r["id"] for r in records] == [1, 2]
+        assert stream._cached_local_paths == {}
+        assert not Path(local_copy).exists()
+
+    @pytest.mark.parametrize("parser", ["simdjson", "ijson"])
+    def test_json_array_nested_path(self, tmp_path, parser):
+        """Test JSON array extraction from a nested path with either parser."""
+        json_path = tmp_path / "users.json"
+        json_path.write_text(
+            json.dumps({"data": {"users": [{"id": 1, "name": "Alice"}, {"id": 2, "name": "Bob"}]}})
+        )
+        config = {
+            "streams": [
+                {
+                    "name": "test_json",
+                    "uri": str(json_path),
+                    "format": "json",
+                    "keys": ["id"],
+                    "json": {"json_path": "data.users.item", "parser": parser},
+                }
+            ]
+        }
+        tap = TapSmartOpen(config=config)
+        stream = tap.discover_streams()[0]
+        records = list(stream.get_records(None))
+        assert records == [{"id": 1, "name": "Alice"}, {"id": 2, "name": "Bob"}]
+
+    def test_json_array_parsers_infer_same_schema(self, tmp_path):
+        """Test simdjson and ijson yield the same records and schema for numbers."""
+        json_path = tmp_path / "amounts.json"
+        json_path.write_text(json.dumps([{"id": 1, "amount": 1.25}, {"id": 2, "amount": 3.5}]))
+
+        def build(parser):
+            config = {
+                "streams": [
+                    {
+                        "name": "test_json",
+                        "uri": str(json_path),
+                        "format": "json",
+                        "keys": ["id"],
+                        "json": {"parser": parser},
+                    }
+                ]
+            }
+            return TapSmartOpen(config=config).discover_streams()[0]
+
+        simdjson_stream, ijson_stream = build("simdjson"), build("ijson")
+        assert ijson_stream.schema == simdjson_stream.schema
+        assert ijson_stream.schema["properties"]["amount"] == {"type": "number"}
+        records = list(ijson_stream.get_records(None))
+        assert records == list(simdjson_stream.get_records(None))
+        assert all(type(r["amount"]) is float for r in records)
+
+    def test_schema_inference_mixed_columns(self, tmp_path):
+        """Test inference for mixed, nested and sometimes-missing columns."""
+        jsonl_path = tmp_path / "mixed.jsonl"
+        rows = [
+            {"id": 1, "amount": 1, "tags": ["a"], "meta": {"k": 1}, "note": "x"},
+            {"id": 2, "amount": 2.5, "tags": [], "meta": None},
+        ]
+        jsonl_path.write_text("\n".join(json.dumps(r) for r in rows))
+        config = {
+            "streams": [
+                {"name": "test_mixed", "uri": str(jsonl_path), "format": "jsonl", "keys": ["id"]}
+            ]
+        }
+        tap = TapSmartOpen(config=config)
+        properties = tap.discover_streams()[0].schema["properties"]
+        assert properties["id"] == {"type": "integer"}
+        assert properties["amount"] == {"type": "number"}
+        assert properties["tags"] == {"type": "array"}
+        assert properties["meta"] == {"type": ["object", "null"]}
+        assert properties["note"] == {"type": ["string", "null"]}
+
+    def test_prefetch_preserves_file_order(self, tmp_path):
+        """Test prefetched files are still read in path order."""
+        import gzip
+
+        uris = []
+        for i in range(5):
+            gz_path = tmp_path / f"part{i}.jsonl.gz"
+            with gzip.open(gz_path, "wt") as f:
+                f.write(json.dumps({"id": i}) + "\n")
+            uris.append(str(gz_path))
+
+        config = {
+            "streams": [
+                {"name": "test_prefetch", "uris": uris, "format": "jsonl", "keys": ["id"], "prefetch": 2}
+            ]
+        }
+        tap = TapSmartOpen(config=config)
+        stream = tap.discover_streams()[0]
+        records = list(stream.get_records(None))
+        assert [r["id"] for r in records] == [0, 1, 2, 3, 4]
+        assert stream._cached_local_paths == {}
+
+    def test_prefetch_cleans_up_when_sync_stops_early(self, tmp_path, monkeypatch):
+        """Test closing a prefetching sync waits for downloads and removes their copies."""
+        import gzip
+        import tempfile
+
+        uris = []
+        for i in range(5):
+            gz_path = tmp_path / f"part{i}.jsonl.gz"
+            with gzip.open(gz_path, "wt") as f:
+                f.write(json.dumps({"id": i}) + "\n")
+            uris.append(str(gz_path))
+
+        config = {
+            "streams": [
+                {
+                    "name": "test_prefetch",
+                    "uris": uris,
+                    "format": "jsonl",
+                    "keys": ["id"],
+                    "prefetch": 3,
+                    "infer_samples": 1,
+                }
+            ]
+        }
+        spool_dir = tmp_path / "spool"
+        spool_dir.mkdir()
+        monkeypatch.setattr(tempfile, "tempdir", str(spool_dir))
+        stream = TapSmartOpen(config=config).streams["test_prefetch"]
+        assert len(list(spool_dir.iterdir())) == 1
+        records = stream.get_records(None)
+        assert next(iter(records))["id"] == 0
+        records.close()
+        assert stream._cached_local_paths == {}
+        assert list(spool_dir.iterdir()) == []
+
+    def test_schema_inferred_once(self, sample_csv_file, monkeypatch):
+        """Test the inferred schema is cached and explicit schemas skip inference."""
+        from tap_smart_open.streams import SmartOpenStream
+
+        calls = []
+        infer_schema = SmartOpenStream._infer_schema
+
+        def counting_infer_schema(stream):
+            calls.append(stream.name)
+            return infer_schema(stream)
+
+        monkeypatch.setattr(SmartOpenStream, "_infer_schema", counting_infer_schema)
+        explicit_schema = {"type": "object", "properties": {"id": {"type": ["string"]}}}
+        config = {
+            "streams": [
+                {"name": "inferred", "uri": sample_csv_file, "format": "csv", "keys": ["id"]},
+                {"name": "explicit", "uri": sample_csv_file, "format": "csv", "keys": ["id"], "schema": explicit_schema},
+            ]
+        }
+        monkeypatch.setattr(TapSmartOpen, "_schema_cache", {})
+        tap = TapSmartOpen(config=config)
+        inferred, explicit = tap.streams["inferred"], tap.streams["explicit"]
+        assert inferred.schema is inferred.schema
+        assert explicit.schema == explicit_schema
+        assert calls == ["inferred"]
+
+    def test_csv_missing_and_infinite_values(self, tmp_path):
+        """Test NaN/inf CSV values are emitted as None."""
+        csv_path = tmp_path / "gaps.csv"
+        csv_path.write_text("id,name,score\n1,Alice,1.5\n2,,inf\n3,Charlie,\n")
+        config = {
+            "streams": [
+                {"name": "test_gaps", "uri": str(csv_path), "format": "csv", "keys": ["id"]}
+            ]
+        }
+        tap = TapSmartOpen(config=config)
+        records = list(tap.discover_streams()[0].get_records(None))
+        assert records == [
+            {"id": 1, "name": "Alice", "score": 1.5},
+            {"id": 2, "name": None, "score": None},
+            {"id": 3, "name": "Charlie", "score": None},
+        ]
+
+    def test_csv_pyarrow_engine_matches_pandas(self, tmp_path):
+        """Test the pyarrow CSV engine yields the same records and schema as pandas."""
+        csv_path = tmp_path / "engines.csv"
+        csv_path.write_text(
+            "id,name,value,timestamp\n"
+            "1,Alice,100,2024-01-01T10:00:00Z\n"
+            "2,,200,2024-01-01T11:00:00Z\n"
+            "3,Charlie,300,\n"
+        )
+
+        def build(engine):
+            csv_opts = {"sep": ",", "header": 0}
+            if engine:
+                csv_opts["engine"] = engine
+            config = {
+                "streams": [
+                    {"name": "test_csv", "uri": str(csv_path), "format": "csv", "keys": ["id"], "csv": csv_opts}
+                ]
+            }
+            return TapSmartOpen(config=config).discover_streams()[0]
+
+        pandas_stream, arrow_stream = build(None), build("pyarrow")
+        records = list(arrow_stream.get_records(None))
+        assert records == list(pandas_stream.get_records(None))
+        assert records[1]["name"] is None
+        assert arrow_stream.schema == pandas_stream.schema
+
+    def test_csv_pyarrow_engine_type_change_after_first_block(self, tmp_path):
+        """Test a value of another type after Arrow's first block falls back to pandas."""
+        csv_path = tmp_path / "drift.csv"
+        rows = [f"{i},name-{i}\n" for i in range(100)] + ["unknown,late\n", "101,\n"]
+        csv_path.write_text("id,name\n" + "".join(rows))
+        config = {
+            "streams": [
+                {
+                    "name": "test_drift",
+                    "uri": str(csv_path),
+                    "format": "csv",
+                    "keys": ["id"],
+                    "infer_samples": 10,
+                    "csv": {"engine": "pyarrow", "block_size": 256},
+                }
+            ]
+        }
+        stream = TapSmartOpen(config=config).discover_streams()[0]
+        records = list(stream.get_records(None))
+        assert len(records) == 102
+        assert records[0] == {"id": 0, "name": "name-0"}
+        assert records[-2:] == [{"id": "unknown", "name": "late"}, {"id": "101", "name": None}]
+
+    def test_parquet_column_projection(self, tmp_path):
+        """Test parquet streams read only the columns of an explicit schema."""
+        import pandas as pd
+
+        parquet_path = tmp_path / "events.parquet"
+        pd.DataFrame(
+            {"id": [1, 2, 3], "score": [1.5, float("nan"), 3.0], "payload": ["a", "b", "c"]}
+        ).to_parquet(parquet_path)
+        explicit_schema = {
+            "type": "object",
+            "properties": {"id": {"type": "integer"}, "score": {"type": ["number", "null"]}},
+        }
+        config = {
+            "streams": [
+                {
+                    "name": "test_parquet",
+                    "uri": str(parquet_path),
+                    "format": "parquet",
+                    "keys": ["id"],
+                    "schema": explicit_schema,
+                    "chunksize": 2,
+                }
+            ]
+        }
+        tap = TapSmartOpen(config=config)
+        records = list(tap.discover_streams()[0].get_records(None))
+        assert records == [
+            {"id": 1, "score": 1.5},
+            {"id": 2, "score": None},
+            {"id": 3, "score": 3.0},
+        ]
+
+    def test_schema_inference_mixed_scalar_types(self, tmp_path):
+        """Test columns mixing scalar types keep every JSON type seen."""
+        jsonl_path = tmp_path / "scalars.jsonl"
+        rows = [
+            {"id": 1, "code": 10, "flag": True, "when": "2024-01-01"},
+            {"id": 2, "code": "A7", "flag": 0, "when": 5},
+        ]
+        jsonl_path.write_text("\n".join(json.dumps(r) for r in rows))
+        config = {
+            "streams": [
+                {"name": "test_scalars", "uri": str(jsonl_path), "format": "jsonl", "keys": ["id"]}
+            ]
+        }
+        tap = TapSmartOpen(config=config)
+        properties = tap.discover_streams()[0].schema["properties"]
+        assert properties["code"] == {"type": ["integer", "string"]}
+        assert properties["flag"] == {"type": ["boolean", "integer"]}
+        assert properties["when"] == {"type": "string", "format": "date-time"}
+
+    def test_schema_cache_dir(self, tmp_path, monkeypatch):
+        """Test inferred schemas are persisted and reused until the files change."""
+        from tap_smart_open.streams import SmartOpenStream
+
+        csv_path = tmp_path / "data.csv"
+        csv_path.write_text("id,name\n1,Alice\n")
+        config = {
+            "schema_cache_dir": str(tmp_path / "cache"),
+            "streams": [{"name": "cached", "uri": str(csv_path), "format": "csv", "keys": ["id"]}],
+        }
+        first = TapSmartOpen(config=config).discover_streams()[0].schema
+        assert (tmp_path / "cache" / "cached.json").exists()
+
+        def fail_infer_schema(stream):
+            raise AssertionError("schema should come from the cache")
+
+        with monkeypatch.context() as m:
+            # Bypass the in-process memo so the schema is read back from disk
+            m.setattr(TapSmartOpen, "_schema_cache", {})
+            m.setattr(SmartOpenStream, "_infer_schema", fail_infer_schema)
+            assert TapSmartOpen(config=config).discover_streams()[0].schema == first
+
+        csv_path.write_text("id,name,amount\n1,Alice,2.5\n")
+        changed = TapSmartOpen(config=config).discover_streams()[0].schema
+        assert "amount" in changed["properties"]
+
+    def test_schema_reused_across_taps(self, tmp_path, monkeypatch):
+        """Test a second tap with the same config reuses the schema inferred by the first."""
+        from tap_smart_open.streams import SmartOpenStream
+
+        csv_path = tmp_path / "data.csv"
+        csv_path.write_text("id,name\n1,Alice\n")
+        config = {"streams": [{"name": "memo", "uri": str(csv_path), "format": "csv", "keys": ["id"]}]}
+        calls = []
+        infer_schema = SmartOpenStream._infer_schema
+
+        def counting_infer_schema(stream):
+            calls.append(stream.name)
+            return infer_schema(stream)
+
+        monkeypatch.setattr(TapSmartOpen, "_schema_cache", {})
+        monkeypatch.setattr(SmartOpenStream, "_infer_schema", counting_infer_schema)
+        first = TapSmartOpen(config=config).discover_streams()[0].schema
+        second = TapSmartOpen(config=config).discover_streams()[0].schema
+        assert second == first
+        assert second is not first
+        assert calls == ["memo"]
+
+        csv_path.write_text("id,name,amount\n1,Alice,2.5\n")
+        changed = TapSmartOpen(config=config).discover_streams()[0].schema
+        assert "amount" in changed["properties"]
+        assert calls == ["memo", "memo"]
+
+    def test_schema_memo_checks_only_sampled_files(self, tmp_path, monkeypatch):
+        """Test discovery without schema_cache_dir only looks up the files inference read."""
+        from fsspec.implementations.local import LocalFileSystem
+
+        uris = []
+        for i in range(5):
+            csv_path = tmp_path / f"part{i}.csv"
+            csv_path.write_text(f"id,name\n{i},name-{i}\n")
+            uris.append(str(csv_path))
+        config = {"streams": [{"name": "memo", "uris": uris, "format": "csv", "keys": ["id"], "infer_samples": 1}]}
+        ukeys = []
+        ukey = LocalFileSystem.ukey
+
+        def counting_ukey(fs, path):
+            ukeys.append(path)
+            return ukey(fs, path)
+
+        monkeypatch.setattr(TapSmartOpen, "_schema_cache", {})
+        monkeypatch.setattr(LocalFileSystem, "ukey", counting_ukey)
+        first = TapSmartOpen(config=config).discover_streams()[0].schema
+        assert TapSmartOpen(config=config).discover_streams()[0].schema == first
+        assert ukeys
+        assert set(ukeys) == {uris[0]}
+
+    def test_permissive_schema_skips_inference(self, sample_csv_file, monkeypatch):
+        """Test permissive_schema declares only keys and never samples files."""
+        from tap_smart_open.streams import SmartOpenStream
+
+        def fail_iter_records_raw(stream, limit=None):
+            raise AssertionError("files should not be read for the schema")
+
+        config = {
+            "streams": [
+                {
+                    "name": "test_permissive",
+                    "uri": sample_csv_file,
+                    "format": "csv",
+                    "keys": ["id"],
+                    "replication_method": "INCREMENTAL",
+                    "replication_key": "timestamp",
+                    "permissive_schema": True,
+                }
+            ]
+        }
+        with monkeypatch.context() as m:
+            m.setattr(SmartOpenStream, "_iter_records_raw", fail_iter_records_raw)
+            stream = TapSmartOpen(config=config).discover_streams()[0]
+            schema = stream.schema
+        assert schema["additionalProperties"] is True
+        assert set(schema["properties"]) == {"id", "timestamp"}
+        assert "required" not in schema
+        assert len(list(stream.get_records(None))) == 3
+
+    def test_permissive_schema_accepts_numeric_keys(self, tmp_path, capsys):
+        """Test records synced with permissive_schema validate against the emitted schema."""
+        from jsonschema import Draft7Validator
+
+        csv_path = tmp_path / "numeric_keys.csv"
+        csv_path.write_text("id,seq,name\n1,10,Alice\n2,20,Bob\n")
+        config = {
+            "streams": [
+                {
+                    "name": "test_numeric_keys",
+                    "uri": str(csv_path),
+                    "format": "csv",
+                    "keys": ["id"],
+                    "replication_method": "INCREMENTAL",
+                    "replication_key": "seq",
+                    "permissive_schema": True,
+                }
+            ]
+        }
+        tap = TapSmartOpen(config=config)
+        capsys.readouterr()
+        tap.sync_all()
+        messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        schema = next(m["schema"] for m in messages if m["type"] == "SCHEMA")
+        records = [m["record"] for m in messages if m["type"] == "RECORD"]
+        assert [r["id"] for r in records] == [1, 2]
+        validator = Draft7Validator(schema)
+        for record in records:
+            validator.validate(record)
+
+    def test_jsonl_batched_parsing(self, tmp_path):
+        """Test JSONL batches handle blank lines, a missing final newline and bad lines."""
+        jsonl_path = tmp_path / "batched.jsonl"
+        jsonl_path.write_bytes(b'{"id": 1}\n\n{"id": 2}\r\n  \n{"id": 3}\n{"id": 4}\n{"id": 5}')
+        config = {
+            "streams": [
+                {
+                    "name": "test_batched",
+                    "uri": str(jsonl_path),
+                    "format": "jsonl",
+                    "keys": ["id"],
+                    "json": {"batch_lines": 2},
+                }
+            ]
+        }
+        stream = TapSmartOpen(config=config).discover_streams()[0]
+        assert [r["id"] for r in stream.get_records(None)] == [1, 2, 3, 4, 5]
+
+        jsonl_path.write_bytes(b'{"id": 1}\n{"id": 2}, {"id": 3}\n')
+        with pytest.raises(ValueError):
+            list(stream._iter_jsonl(str(jsonl_path)))
+
+    def test_directory_pattern_filter(self, tmp_path):
+        """Test a directory URI with a pattern keeps only matching file names."""
+        for name in ["sales_1.csv", "sales_2.csv", "returns_1.csv"]:
+            (tmp_path / name).write_text("id\n1\n")
+        config = {
+            "streams": [
+                {"name": "test_pattern", "uri": str(tmp_path), "pattern": r"^sales_\d+\.csv$", "format": "csv"}
+            ]
+        }
+        stream = TapSmartOpen(config=config).discover_streams()[0]
+        assert [Path(p).name for p in stream._iter_paths()] == ["sales_1.csv", "sales_2.csv"]
+
+    @pytest.mark.parametrize("sort_paths", [True, False])
+    def test_glob_listing_order(self, sort_paths):
+        """Test glob matches are sorted by default and keep the backend's order otherwise."""
+        listed = ["/data/c.csv", "/data/a.csv", "/data/skip.txt", "/data/b.csv"]
+
+        class ListingFileSystem:
+            def glob(self, path):
+                return list(listed)
+
+        config = {
+            "streams": [
+                {
+                    "name": "test_order",
+                    "uri": "/data/*",
+                    "pattern": r"\.csv$",
+                    "format": "csv",
+                    "permissive_schema": True,
+                    "sort_paths": sort_paths,
+                }
+            ]
+        }
+        tap = TapSmartOpen(config=config)
+        tap._fs_cache[("file", "")] = ListingFileSystem()
+        stream = tap.discover_streams()[0]
+        expected = ["/data/c.csv", "/data/a.csv", "/data/b.csv"]
+        assert stream._iter_paths() == (sorted(expected) if sort_paths else expected)
+
+    def test_jsonl_projection_with_closed_schema(self, tmp_path):
+        """Test JSONL streams with a closed explicit schema keep only declared fields."""
+        jsonl_path = tmp_path / "wide.jsonl"
+        rows = [
+            {"id": 1, "name": "Alice", "blob": {"large": [1, 2, 3]}, "tags": ["a"]},
+            {"id": 2, "blob": None, "tags": []},
+        ]
+        jsonl_path.write_text("\n".join(json.dumps(r) for r in rows))
+        explicit_schema = {
+            "type": "object",
+            "properties": {"id": {"type": "integer"}, "name": {"type": ["string", "null"]}, "tags": {"type": "array"}},
+        }
+        config = {
+            "streams": [
+                {"name": "test_wide", "uri": str(jsonl_path), "format": "jsonl", "keys": ["id"], "schema": explicit_schema}
+            ]
+        }
+        stream = TapSmartOpen(config=config).discover_streams()[0]
+        records = list(stream.get_records(None))
+        assert records == [
+            {"id": 1, "name": "Alice", "tags": ["a"]},
+            {"id": 2, "tags": []},
+        ]
+        # Records share one copy of each key
+        first_keys = {k: k for k in records[0]}
+        assert all(first_keys[k] is k for k in records[1])
+
+    def test_csv_pyarrow_engine_block_size(self, tmp_path):
+        """Test the pyarrow engine streams small blocks across many batches."""
+        csv_path = tmp_path / "blocks.csv"
+        csv_path.write_text("id|name\n" + "".join(f"{i}|name-{i}\n" for i in range(200)))
+        config = {
+            "streams": [
+                {
+                    "name": "test_blocks",
+                    "uri": str(csv_path),
+                    "format": "csv",
+                    "keys": ["id"],
+                    "csv": {"sep": "|", "engine": "pyarrow", "block_size": 256},
+                }
+            ]
+        }
+        stream = TapSmartOpen(config=config).discover_streams()[0]
+        records = list(stream.get_records(None))
+        assert len(records) == 200
+        assert records[-1] == {"id": 199, "name": "name-199"}
+
+    def test_jsonl_line_splitting_across_blocks(self):
+        """Test the block reader reassembles lines split across read boundaries."""
+        import io
+
+        from tap_smart_open.streams import _iter_lines
+
+        data = b'{"id": 1}\n\n{"id": 22}\r\n{"id": 333}'
+        for read_size in (1, 3, 7, 64):
+            lines = list(_iter_lines(io.BytesIO(data), read_size))
+            assert lines == [b'{"id": 1}', b'{"id": 22}\r', b'{"id": 333}']
+
+    def test_message_output_matches_sdk_serializer(self, sample_csv_file, capsys):
+        """Test orjson message output is identical to the SDK's own serializer."""
+        import datetime
+        import decimal
+
+        from singer_sdk._singerlib import RecordMessage, StateMessage
+        from singer_sdk._singerlib.json import serialize_json
+
+        tap = TapSmartOpen(config={"streams": [{"name": "test_csv", "uri": sample_csv_file}]})
+        messages = [
+            RecordMessage(
+                stream="test_csv",
+                record={"id": 1, "name": "Alice", "ts": datetime.datetime(2024, 1, 1, 10, tzinfo=datetime.timezone.utc)},
+            ),
+            RecordMessage(stream="test_csv", record={"id": 2, "amount": decimal.Decimal("1.10")}),
+        ]
+        capsys.readouterr()
+        for message in messages:
+            tap.write_message(message)
+        messages.append(StateMessage(value={"bookmarks": {}}))
+        tap.write_message(messages[-1])
+        expected = "".join(serialize_json(m.to_dict()) + "\n" for m in messages)
+        assert capsys.readouterr().out == expected
+
+    def test_discover_streams_concurrently_keeps_order(self, tmp_path):
+        """Test streams built in parallel come back in config order with their own schemas."""
+        stream_configs = []
+        for i in range(6):
+            csv_path = tmp_path / f"data_{i}.csv"
+            csv_path.write_text(f"id,col_{i}\n1,x\n")
+            stream_configs.append({"name": f"stream_{i}", "uri": str(csv_path), "format": "csv", "keys": ["id"]})
+        streams = TapSmartOpen(config={"streams": stream_configs}).discover_streams()
+        assert [s.name for s in streams] == [f"stream_{i}" for i in range(6)]
+        assert [list(s.schema["properties"]) for s in streams] == [["id", f"col_{i}"] for i in range(6)]
+
+    def test_jsonl_memory_mapped_line_splitting(self, tmp_path):
+        """Test the mmap line reader cuts blocks at newlines and handles empty files."""
+        from tap_smart_open.streams import _iter_file_lines
+
+        jsonl_path = tmp_path / "lines.jsonl"
+        jsonl_path.write_bytes(b'{"id": 1}\n\n{"id": 22, "long": "' + b"x" * 40 + b'"}\r\n{"id": 333}')
+        for block_size in (1, 3, 7, 64, 1 << 20):
+            with open(jsonl_path, "rb") as fh:
+                lines = list(_iter_file_lines(fh, block_size))
+            assert lines == [b'{"id": 1}', b'{"id": 22, "long": "' + b"x" * 40 + b'"}\r', b'{"id": 333}']
+
+        empty_path = tmp_path / "empty.jsonl"
+        empty_path.write_bytes(b"")
+        with open(empty_path, "rb") as fh:
+            assert list(_iter_file_lines(fh, 64)) == []
+
+    def test_record_messages_written_in_batches(self, sample_csv_file, capsys):
+        """Test RECORD messages are flushed every output_batch_size records and at sync end."""
+        from singer_sdk._singerlib import RecordMessage
+
+        config = {"output_batch_size": 2, "streams": [{"name": "test_csv", "uri": sample_csv_file, "keys": ["id"]}]}
+        tap = TapSmartOpen(config=config)
+        capsys.readouterr()
+        tap.write_message(RecordMessage(stream="test_csv", record={"id": 1}))
+        assert capsys.readouterr().out == ""
+        tap.write_message(RecordMessage(stream="test_csv", record={"id": 2}))
+        assert len(capsys.readouterr().out.splitlines()) == 2
+
+        tap.sync_all()
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [m["record"]["name"] for m in lines if m["type"] == "RECORD"] == ["Alice", "Bob", "Charlie"]
+
+    def test_state_checkpoint_interval(self, sample_csv_file, capsys):
+        """Test state_checkpoint_interval sets how often STATE messages are written mid-sync."""
+        def state_positions(interval):
+            config = {
+                "state_checkpoint_interval": interval,
+                "streams": [
+                    {
+                        "name": "test_csv",
+                        "uri": sample_csv_file,
+                        "keys": ["id"],
+                        "replication_method": "INCREMENTAL",
+                        "replication_key": "id",
+                    }
+                ],
+            }
+            tap = TapSmartOpen(config=config)
+            capsys.readouterr()
+            tap.sync_all()
+            types = [json.loads(line)["type"] for line in capsys.readouterr().out.splitlines()]
+            types = [t for t in types if t in ("RECORD", "STATE")]
+            return [i for i, t in enumerate(types) if t == "STATE"]
+
+        # Interval 1 writes STATE after every record, before the final ones
+        assert state_positions(1)[:4] == [0, 2, 4, 6]
+        # The default interval writes STATE only around the three records
+        assert state_positions(10000) == [0, 4]
+
+    def test_ranged_copy_reassembles_parts_in_order(self, monkeypatch):
+        """Test ranged downloads write every part in order, including a short last part."""
+        import io
+
+        import fsspec
+
+        from tap_smart_open import streams
+
+        fs = fsspec.filesystem("memory")
+        data = bytes(range(256)) * 41
+        fs.pipe("/ranged/data.csv", data)
+        for part_size, parallel in ((1000, 3), (4096, 1), (len(data), 8)):
+            monkeypatch.setattr(streams, "_RANGED_PART_SIZE", part_size)
+            monkeypatch.setattr(streams, "_RANGED_PARALLEL_PARTS", parallel)
+            out = io.BytesIO()
+            streams._copy_ranges(fs, "/ranged/data.csv", len(data), out)
+            assert out.getvalue() == data